@@ -1,16 +1,67 @@
-import whisper
+from faster_whisper import WhisperModel, BatchedInferencePipeline, decode_audio
+import numpy as np
+import torch
+import asyncio
 import os
-from typing import Optional
+from typing import List, Optional, Union
+
+VAD_PARAMETERS = {'min_silence_duration_ms': 500}
+MAX_REPEAT_NGRAM = 8
+MAX_NGRAM_REPEATS = 3
+
+def _remove_repetitions(text: str) -> str:
+    words = []
+    for word in text.split():
+        words.append(word)
+        for n in range(1, MAX_REPEAT_NGRAM + 1):
+            span = n * (MAX_NGRAM_REPEATS + 1)
+            if len(words) < span:
+                break
+            tail = words[-n:]
+            if all(words[-span + k * n:-span + (k + 1) * n] == tail for k in range(MAX_NGRAM_REPEATS)):
+                del words[-n:]
+                break
+    return ' '.join(words)
 
 class AudioProcessor:
     
     def __init__(self, model_size: str = 'base'):
         
-        print(f" Loading Whisper {model_size} model...")
-        self.model = whisper.load_model(model_size)
+        device, compute_type = self._select_device()
+        
+        print(f" Loading Whisper {model_size} model ({device}, {compute_type})...")
+        self.model = WhisperModel(model_size, device=device, compute_type=compute_type)
+        self.batched = BatchedInferencePipeline(model=self.model)
         print(" Whisper model loaded")
         
+        self.device = torch.device(device)
+        extractor = self.model.feature_extractor
+        self._mel_filters = torch.from_numpy(extractor.mel_filters).float().to(self.device)
+        self._hann = torch.hann_window(extractor.n_fft).to(self.device)
+        
         self.supported_formats = ['.mp3', '.wav', '.m4a', '.ogg', '.flac']
+        self.batch_size = 16
+        
+        self._warm_up()
+    
+    def _warm_up(self):
+        
+        print(" Warming up Whisper model...")
+        dummy = np.zeros(self.model.feature_extractor.sampling_rate, dtype=np.float32)
+        with torch.inference_mode():
+            self._log_mel_spectrogram(dummy)
+        segments, _ = self.model.transcribe(dummy, language='en', vad_filter=False)
+        list(segments)
+        print(" Whisper warm-up complete")
+    
+    @staticmethod
+    def _select_device():
+        
+        if not torch.cuda.is_available():
+            return 'cpu', 'int8'
+        
+        has_tensor_cores = torch.cuda.get_device_capability()[0] >= 7
+        return 'cuda', 'int8_float16' if has_tensor_cores else 'int8'
     
     async def transcribe(self, audio_path: str, language: str = 'en') -> str:
         
@@ -22,47 +73,111 @@ class AudioProcessor:
         try:
             print(f" Transcribing audio: {audio_path}")
             
-            result = self.model.transcribe(
-                audio_path,
-                language=language,
-                task='transcribe',
-                verbose=False
-            )
-            
-            text = result['text']
+            loop = asyncio.get_running_loop()
+            text = await loop.run_in_executor(None, self._transcribe_sync, audio_path, language)
             
             print(f" Transcription complete: {len(text)} characters")
             
             return text
-            
+        
         except Exception as e:
             print(f" Transcription error: {e}")
             raise
     
+    def _transcribe_sync(self, audio_path: str, language: str) -> str:
+        
+        extractor = self.model.feature_extractor
+        audio = decode_audio(audio_path, sampling_rate=extractor.sampling_rate)
+        
+        if len(audio) <= extractor.n_samples:
+            # A single window gains nothing from batching, and skipping
+            # timestamp tokens shortens the decode loop. VAD stays on so
+            # silence isn't decoded into hallucinated text.
+            segments, info = self.model.transcribe(
+                audio,
+                language=language,
+                task='transcribe',
+                without_timestamps=True,
+                vad_filter=True,
+                vad_parameters=VAD_PARAMETERS
+            )
+        else:
+            segments, info = self.batched.transcribe(
+                audio,
+                batch_size=self.batch_size,
+                language=language,
+                task='transcribe',
+                vad_filter=True,
+                vad_parameters=VAD_PARAMETERS
+            )
+        
+        # segments is lazy: the actual decoding runs while it is consumed here
+        return _remove_repetitions("".join(segment.text for segment in segments))
+    
+    async def transcribe_batch(
+        self,
+        audio_paths: List[str],
+        language: str = 'en'
+    ) -> List[Union[str, Exception]]:
+        
+        results: List[Union[str, Exception]] = []
+        for audio_path in audio_paths:
+            try:
+                results.append(await self.transcribe(audio_path, language=language))
+            except Exception as e:
+                results.append(e)
+        
+        return results
+    
     def transcribe_with_timestamps(self, audio_path: str):
         
-        result = self.model.transcribe(
+        segments, _ = self.model.transcribe(
             audio_path,
             word_timestamps=True
         )
         
-        return result['segments']
+        return [
+            {
+                'id': segment.id,
+                'start': segment.start,
+                'end': segment.end,
+                'text': segment.text,
+                'words': [
+                    {'word': w.word, 'start': w.start, 'end': w.end, 'probability': w.probability}
+                    for w in (segment.words or [])
+                ]
+            }
+            for segment in segments
+        ]
     
-    def detect_language(self, audio_path: str) -> str:
+    def _log_mel_spectrogram(self, audio: np.ndarray) -> np.ndarray:
         
-        audio = whisper.load_audio(audio_path)
-        audio = whisper.pad_or_trim(audio)
-        
-        mel = whisper.log_mel_spectrogram(audio).to(self.model.device)
+        extractor = self.model.feature_extractor
+        waveform = torch.from_numpy(audio).to(self.device)
+        waveform = torch.nn.functional.pad(waveform, (0, extractor.hop_length))
+        stft = torch.stft(
+            waveform, extractor.n_fft, extractor.hop_length,
+            window=self._hann, return_complex=True
+        )
+        magnitudes = stft[..., :-1].abs() ** 2
+        mel = self._mel_filters @ magnitudes
+        log_spec = torch.clamp(mel, min=1e-10).log10()
+        log_spec = torch.maximum(log_spec, log_spec.max() - 8.0)
+        log_spec = (log_spec + 4.0) / 4.0
+        return log_spec.cpu().numpy()
+    
+    def detect_language(self, audio_path: str) -> str:
         
-        _, probs = self.model.detect_language(mel)
-        detected_lang = max(probs, key=probs.get)
+        audio = decode_audio(audio_path)[:self.model.feature_extractor.n_samples]
+        features = self._log_mel_spectrogram(audio)
+        detected_lang, _, _ = self.model.detect_language(features=features)
         
         return detected_lang
     
-    def transcribe_multilingual(self, audio_path: str) -> str:
+    async def transcribe_multilingual(self, audio_path: str) -> str:
         
-        detected_lang = self.detect_language(audio_path)
+        loop = asyncio.get_running_loop()
+        detected_lang = await loop.run_in_executor(None, self.detect_language, audio_path)
         print(f" Detected language: {detected_lang}")
         
-        return self.transcribe(audio_path, language=detected_lang)
+        return await self.transcribe(audio_path, language=detected_lang)
@@ -1,71 +1,188 @@
 import sqlite3
 import json
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
 from datetime import datetime
+from contextlib import contextmanager
+import queue
+import atexit
 import os
 
+TIMESTAMP_COLUMNS = {
+    'cases': ('upload_date', 'processed_date'),
+    'feedback': ('feedback_date',),
+    'analytics': ('recorded_date',),
+}
+
+def _now() -> int:
+    return int(datetime.now().timestamp())
+
+def _to_iso(row: Dict, table: str) -> Dict:
+    for column in TIMESTAMP_COLUMNS[table]:
+        if row.get(column) is not None:
+            row[column] = datetime.fromtimestamp(row[column]).isoformat()
+    return row
+
 class DatabaseManager:
     
-    def __init__(self, db_path: str = "legal_summarizer.db"):
+    def __init__(self, db_path: str = "legal_summarizer.db", pool_size: int = 8):
         self.db_path = db_path
+        self._pool = queue.SimpleQueue()
+        for _ in range(pool_size):
+            self._pool.put(self._make_conn())
+        atexit.register(self.close)
         self._init_database()
     
-    def _init_database(self):
-        
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS cases (
-                case_id TEXT PRIMARY KEY,
-                filename TEXT NOT NULL,
-                file_type TEXT NOT NULL,
-                file_path TEXT NOT NULL,
-                upload_date TEXT NOT NULL,
-                processed_date TEXT,
-                status TEXT DEFAULT 'pending',
-                error TEXT
-            )
-        ''')
-        
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS summaries (
-                case_id TEXT PRIMARY KEY,
-                overview TEXT,
-                key_points TEXT,
-                entities TEXT,
-                timeline TEXT,
-                legal_references TEXT,
-                confidence_score REAL,
-                processing_time REAL,
-                FOREIGN KEY (case_id) REFERENCES cases(case_id)
-            )
-        ''')
-        
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS feedback (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                case_id TEXT NOT NULL,
-                rating INTEGER NOT NULL,
-                comments TEXT,
-                corrections TEXT,
-                feedback_date TEXT NOT NULL,
-                processed BOOLEAN DEFAULT 0,
-                FOREIGN KEY (case_id) REFERENCES cases(case_id)
-            )
-        ''')
+    def _make_conn(self) -> sqlite3.Connection:
+        
+        conn = sqlite3.connect(
+            self.db_path,
+            check_same_thread=False,
+            isolation_level=None
+        )
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute('PRAGMA temp_store=MEMORY')
+        conn.execute('PRAGMA cache_size=-65536')
+        return conn
+    
+    @contextmanager
+    def conn(self) -> Iterator[sqlite3.Connection]:
+        
+        conn = self._pool.get()
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            self._pool.put(conn)
+    
+    def close(self):
         
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS analytics (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                metric_name TEXT NOT NULL,
-                metric_value REAL NOT NULL,
-                recorded_date TEXT NOT NULL
-            )
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                break
+    
+    def _legacy_timestamp_tables(self, cursor: sqlite3.Cursor) -> List[str]:
+        
+        legacy = []
+        for table, columns in TIMESTAMP_COLUMNS.items():
+            cursor.execute(f'PRAGMA table_info({table})')
+            types = {row[1]: row[2] for row in cursor.fetchall()}
+            if types.get(columns[0]) == 'TEXT':
+                legacy.append(table)
+        return legacy
+    
+    def _copy_legacy_rows(self, cursor: sqlite3.Cursor, table: str):
+        
+        cursor.execute(f'PRAGMA table_info({table}_legacy)')
+        columns = [row[1] for row in cursor.fetchall()]
+        select = ', '.join(
+            f"CAST(strftime('%s', {column}, 'utc') AS INTEGER)"
+            if column in TIMESTAMP_COLUMNS[table] else column
+            for column in columns
+        )
+        cursor.execute(f'''
+            INSERT INTO {table} ({', '.join(columns)})
+            SELECT {select} FROM {table}_legacy
         ''')
+        cursor.execute(f'DROP TABLE {table}_legacy')
+    
+    def _init_database(self):
         
-        conn.commit()
-        conn.close()
+        with self.conn() as conn:
+            cursor = conn.cursor()
+            
+            # ISO8601 TEXT dates from older databases are migrated to unix seconds
+            legacy_tables = self._legacy_timestamp_tables(cursor)
+            if legacy_tables:
+                cursor.execute('PRAGMA legacy_alter_table=ON')
+                cursor.execute('BEGIN IMMEDIATE')
+                for table in legacy_tables:
+                    cursor.execute(f'ALTER TABLE {table} RENAME TO {table}_legacy')
+            
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS cases (
+                    case_id TEXT PRIMARY KEY,
+                    filename TEXT NOT NULL,
+                    file_type TEXT NOT NULL,
+                    file_path TEXT NOT NULL,
+                    upload_date INTEGER NOT NULL,
+                    processed_date INTEGER,
+                    status TEXT DEFAULT 'pending',
+                    error TEXT
+                )
+            ''')
+            
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS summaries (
+                    case_id TEXT PRIMARY KEY,
+                    overview TEXT,
+                    key_points TEXT,
+                    entities TEXT,
+                    timeline TEXT,
+                    legal_references TEXT,
+                    confidence_score REAL,
+                    processing_time REAL,
+                    FOREIGN KEY (case_id) REFERENCES cases(case_id)
+                )
+            ''')
+            
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS feedback (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    case_id TEXT NOT NULL,
+                    rating INTEGER NOT NULL,
+                    comments TEXT,
+                    corrections TEXT,
+                    feedback_date INTEGER NOT NULL,
+                    processed BOOLEAN DEFAULT 0,
+                    FOREIGN KEY (case_id) REFERENCES cases(case_id)
+                )
+            ''')
+            
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS analytics (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    metric_name TEXT NOT NULL,
+                    metric_value REAL NOT NULL,
+                    recorded_date INTEGER NOT NULL
+                )
+            ''')
+            
+            if legacy_tables:
+                for table in legacy_tables:
+                    self._copy_legacy_rows(cursor, table)
+                cursor.execute('COMMIT')
+                cursor.execute('PRAGMA legacy_alter_table=OFF')
+            
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_cases_status_date
+                ON cases(status, upload_date DESC)
+            ''')
+            
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_cases_upload_date
+                ON cases(upload_date DESC)
+            ''')
+            
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_feedback_processed
+                ON feedback(processed, feedback_date DESC)
+            ''')
+            
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_feedback_case
+                ON feedback(case_id)
+            ''')
+            
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_analytics_name_date
+                ON analytics(metric_name, recorded_date DESC)
+            ''')
+            
+            cursor.close()
         
         print("✅ Database initialized")
     
@@ -75,19 +192,18 @@ class DatabaseManager:
         filename: str,
         file_type: str,
         file_path: str,
-        upload_date: str
+        upload_date: Optional[int] = None
     ):
         
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT INTO cases (case_id, filename, file_type, file_path, upload_date, status)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (case_id, filename, file_type, file_path, upload_date, 'pending'))
-        
-        conn.commit()
-        conn.close()
+        with self.conn() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute('''
+                INSERT INTO cases (case_id, filename, file_type, file_path, upload_date, status)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', (case_id, filename, file_type, file_path, upload_date or _now(), 'pending'))
+            
+            cursor.close()
     
     def update_status(
         self,
@@ -96,69 +212,67 @@ class DatabaseManager:
         error: Optional[str] = None
     ):
         
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        if status == 'completed':
-            cursor.execute('''
-                UPDATE cases 
-                SET status = ?, processed_date = ?, error = ?
-                WHERE case_id = ?
-            ''', (status, datetime.now().isoformat(), error, case_id))
-        else:
-            cursor.execute('''
-                UPDATE cases 
-                SET status = ?, error = ?
-                WHERE case_id = ?
-            ''', (status, error, case_id))
-        
-        conn.commit()
-        conn.close()
+        with self.conn() as conn:
+            cursor = conn.cursor()
+            
+            if status == 'completed':
+                cursor.execute('''
+                    UPDATE cases 
+                    SET status = ?, processed_date = ?, error = ?
+                    WHERE case_id = ?
+                ''', (status, _now(), error, case_id))
+            else:
+                cursor.execute('''
+                    UPDATE cases 
+                    SET status = ?, error = ?
+                    WHERE case_id = ?
+                ''', (status, error, case_id))
+            
+            cursor.close()
     
     def save_summary(self, case_id: str, summary: Dict):
         
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT OR REPLACE INTO summaries 
-            (case_id, overview, key_points, entities, timeline, legal_references, 
-             confidence_score, processing_time)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            case_id,
-            summary.get('overview', ''),
-            json.dumps(summary.get('key_points', [])),
-            json.dumps(summary.get('entities', {})),
-            json.dumps(summary.get('timeline', [])),
-            json.dumps(summary.get('legal_references', [])),
-            summary.get('confidence_score', 0.0),
-            summary.get('processing_time', 0.0)
-        ))
-        
-        conn.commit()
-        conn.close()
+        with self.conn() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute('''
+                INSERT OR REPLACE INTO summaries 
+                (case_id, overview, key_points, entities, timeline, legal_references, 
+                 confidence_score, processing_time)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (
+                case_id,
+                summary.get('overview', ''),
+                json.dumps(summary.get('key_points', [])),
+                json.dumps(summary.get('entities', {})),
+                json.dumps(summary.get('timeline', [])),
+                json.dumps(summary.get('legal_references', [])),
+                summary.get('confidence_score', 0.0),
+                summary.get('processing_time', 0.0)
+            ))
+            
+            cursor.close()
     
     def get_summary(self, case_id: str) -> Optional[Dict]:
         
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT c.*, s.*
-            FROM cases c
-            LEFT JOIN summaries s ON c.case_id = s.case_id
-            WHERE c.case_id = ?
-        ''', (case_id,))
-        
-        row = cursor.fetchone()
-        conn.close()
+        with self.conn() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = sqlite3.Row
+            
+            cursor.execute('''
+                SELECT c.*, s.*
+                FROM cases c
+                LEFT JOIN summaries s ON c.case_id = s.case_id
+                WHERE c.case_id = ?
+            ''', (case_id,))
+            
+            row = cursor.fetchone()
+            cursor.close()
         
         if not row:
             return None
         
-        result = dict(row)
+        result = _to_iso(dict(row), 'cases')
         
         if result.get('key_points'):
             result['key_points'] = json.loads(result['key_points'])
@@ -187,40 +301,41 @@ class DatabaseManager:
         limit: int = 50
     ) -> List[Dict]:
         
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        
-        if status:
-            cursor.execute('''
-                SELECT * FROM cases 
-                WHERE status = ?
-                ORDER BY upload_date DESC
-                LIMIT ?
-            ''', (status, limit))
-        else:
-            cursor.execute('''
-                SELECT * FROM cases 
-                ORDER BY upload_date DESC
-                LIMIT ?
-            ''', (limit,))
-        
-        rows = cursor.fetchall()
-        conn.close()
-        
-        return [dict(row) for row in rows]
+        with self.conn() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = sqlite3.Row
+            
+            if status:
+                cursor.execute('''
+                    SELECT * FROM cases 
+                    WHERE status = ?
+                    ORDER BY upload_date DESC
+                    LIMIT ?
+                ''', (status, limit))
+            else:
+                cursor.execute('''
+                    SELECT * FROM cases 
+                    ORDER BY upload_date DESC
+                    LIMIT ?
+                ''', (limit,))
+            
+            rows = cursor.fetchall()
+            cursor.close()
+        
+        return [_to_iso(dict(row), 'cases') for row in rows]
     
     def delete_case(self, case_id: str):
         
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('DELETE FROM summaries WHERE case_id = ?', (case_id,))
-        cursor.execute('DELETE FROM feedback WHERE case_id = ?', (case_id,))
-        cursor.execute('DELETE FROM cases WHERE case_id = ?', (case_id,))
-        
-        conn.commit()
-        conn.close()
+        with self.conn() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute('BEGIN')
+            cursor.execute('DELETE FROM summaries WHERE case_id = ?', (case_id,))
+            cursor.execute('DELETE FROM feedback WHERE case_id = ?', (case_id,))
+            cursor.execute('DELETE FROM cases WHERE case_id = ?', (case_id,))
+            cursor.execute('COMMIT')
+            
+            cursor.close()
     
     def save_feedback(
         self,
@@ -230,42 +345,41 @@ class DatabaseManager:
         corrections: Optional[Dict] = None
     ):
         
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT INTO feedback 
-            (case_id, rating, comments, corrections, feedback_date)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (
-            case_id,
-            rating,
-            comments,
-            json.dumps(corrections) if corrections else None,
-            datetime.now().isoformat()
-        ))
-        
-        conn.commit()
-        conn.close()
+        with self.conn() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute('''
+                INSERT INTO feedback 
+                (case_id, rating, comments, corrections, feedback_date)
+                VALUES (?, ?, ?, ?, ?)
+            ''', (
+                case_id,
+                rating,
+                comments,
+                json.dumps(corrections) if corrections else None,
+                _now()
+            ))
+            
+            cursor.close()
     
     def get_pending_feedback(self) -> List[Dict]:
         
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT * FROM feedback 
-            WHERE processed = 0
-            ORDER BY feedback_date DESC
-        ''')
-        
-        rows = cursor.fetchall()
-        conn.close()
+        with self.conn() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = sqlite3.Row
+            
+            cursor.execute('''
+                SELECT * FROM feedback 
+                WHERE processed = 0
+                ORDER BY feedback_date DESC
+            ''')
+            
+            rows = cursor.fetchall()
+            cursor.close()
         
         feedback_list = []
         for row in rows:
-            data = dict(row)
+            data = _to_iso(dict(row), 'feedback')
             if data.get('corrections'):
                 data['corrections'] = json.loads(data['corrections'])
             feedback_list.append(data)
@@ -274,57 +388,84 @@ class DatabaseManager:
     
     def mark_feedback_processed(self, feedback_ids: List[int]):
         
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        placeholders = ','.join('?' * len(feedback_ids))
-        cursor.execute(f'''
-            UPDATE feedback 
-            SET processed = 1
-            WHERE id IN ({placeholders})
-        ''', feedback_ids)
-        
-        conn.commit()
-        conn.close()
+        if not feedback_ids:
+            return
+        
+        with self.conn() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute('BEGIN IMMEDIATE')
+            cursor.executemany('''
+                UPDATE feedback
+                SET processed = 1
+                WHERE id = ?
+            ''', [(feedback_id,) for feedback_id in feedback_ids])
+            cursor.execute('COMMIT')
+            
+            cursor.close()
     
     def get_statistics(self) -> Dict:
         
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        stats = {}
-        
-        cursor.execute('SELECT COUNT(*) FROM cases')
-        stats['total'] = cursor.fetchone()[0]
-        
-        for status in ['completed', 'processing', 'failed', 'pending']:
-            cursor.execute('SELECT COUNT(*) FROM cases WHERE status = ?', (status,))
-            stats[status] = cursor.fetchone()[0]
-        
-        cursor.execute('SELECT AVG(confidence_score) FROM summaries')
-        avg_confidence = cursor.fetchone()[0]
-        stats['avg_confidence'] = round(avg_confidence, 2) if avg_confidence else 0.0
-        
-        cursor.execute('SELECT AVG(processing_time) FROM summaries')
-        avg_time = cursor.fetchone()[0]
-        stats['avg_processing_time'] = round(avg_time, 2) if avg_time else 0.0
-        
-        conn.close()
+        with self.conn() as conn:
+            cursor = conn.cursor()
+            
+            stats = {}
+            
+            cursor.execute('SELECT COUNT(*) FROM cases')
+            stats['total'] = cursor.fetchone()[0]
+            
+            for status in ['completed', 'processing', 'failed', 'pending']:
+                cursor.execute('SELECT COUNT(*) FROM cases WHERE status = ?', (status,))
+                stats[status] = cursor.fetchone()[0]
+            
+            cursor.execute('SELECT AVG(confidence_score) FROM summaries')
+            avg_confidence = cursor.fetchone()[0]
+            stats['avg_confidence'] = round(avg_confidence, 2) if avg_confidence else 0.0
+            
+            cursor.execute('SELECT AVG(processing_time) FROM summaries')
+            avg_time = cursor.fetchone()[0]
+            stats['avg_processing_time'] = round(avg_time, 2) if avg_time else 0.0
+            
+            cursor.close()
         
         return stats
     
     def log_metric(self, metric_name: str, metric_value: float):
         
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT INTO analytics (metric_name, metric_value, recorded_date)
-            VALUES (?, ?, ?)
-        ''', (metric_name, metric_value, datetime.now().isoformat()))
+        with self.conn() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute('''
+                INSERT INTO analytics (metric_name, metric_value, recorded_date)
+                VALUES (?, ?, ?)
+            ''', (metric_name, metric_value, _now()))
+            
+            cursor.close()
+    
+    def log_metrics_bulk(
+        self,
+        rows: Iterable[Union[Tuple[str, float], Tuple[str, float, int]]]
+    ):
         
-        conn.commit()
-        conn.close()
+        recorded_date = _now()
+        rows = [
+            (row[0], row[1], row[2] if len(row) > 2 else recorded_date)
+            for row in rows
+        ]
+        if not rows:
+            return
+        
+        with self.conn() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute('BEGIN IMMEDIATE')
+            cursor.executemany('''
+                INSERT INTO analytics (metric_name, metric_value, recorded_date)
+                VALUES (?, ?, ?)
+            ''', rows)
+            cursor.execute('COMMIT')
+            
+            cursor.close()
     
     def get_metrics_history(
         self,
@@ -332,18 +473,18 @@ class DatabaseManager:
         limit: int = 100
     ) -> List[Dict]:
         
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT * FROM analytics 
-            WHERE metric_name = ?
-            ORDER BY recorded_date DESC
-            LIMIT ?
-        ''', (metric_name, limit))
-        
-        rows = cursor.fetchall()
-        conn.close()
+        with self.conn() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = sqlite3.Row
+            
+            cursor.execute('''
+                SELECT * FROM analytics 
+                WHERE metric_name = ?
+                ORDER BY recorded_date DESC
+                LIMIT ?
+            ''', (metric_name, limit))
+            
+            rows = cursor.fetchall()
+            cursor.close()
         
-        return [dict(row) for row in rows]
+        return [_to_iso(dict(row), 'analytics') for row in rows]
@@ -2,14 +2,18 @@ from fastapi import FastAPI, File, UploadFile, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from datetime import datetime
+from typing import Optional
 import os
 import uuid
 import asyncio
 import glob
+import aiofiles
 from preprocessing import PreprocessingModule
 from summarizer import summarize_text
 from ocr_processor import OCRProcessor
 from audio_processor import AudioProcessor
+from database import DatabaseManager
+from monitoring import start_monitoring
 
 app = FastAPI(title="Legal Summarizer API", version="Offline-1.0")
 
@@ -20,59 +24,148 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-preprocessing_module = PreprocessingModule()
-ocr_processor = OCRProcessor()
-audio_processor = AudioProcessor()
+# Created in startup_event, not at import: the OCR pool spawns workers that
+# re-import this module as __mp_main__ and must not load Whisper or the DB.
+preprocessing_module = None
+ocr_processor = None
+audio_processor = None
+db = None
 
 UPLOAD_DIR = "uploads"
 DATA_DIR = "data"
+UPLOAD_CHUNK_SIZE = 1 << 20
+MAX_UPLOAD_SIZE = 50 * 1024 * 1024
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 os.makedirs(DATA_DIR, exist_ok=True)
 
+FILE_TYPES = {
+    'txt': 'text', 'doc': 'text', 'docx': 'text',
+    'pdf': 'image', 'jpg': 'image', 'jpeg': 'image', 'png': 'image',
+    'mp3': 'audio', 'wav': 'audio', 'm4a': 'audio'
+}
+
 processing_queue = asyncio.Queue()
 
+BATCH_SIZE = 16
+BATCH_TIMEOUT = 0.25
+
+async def next_batch():
+    batch = [await processing_queue.get()]
+    try:
+        while len(batch) < BATCH_SIZE:
+            batch.append(await asyncio.wait_for(processing_queue.get(), timeout=BATCH_TIMEOUT))
+    except asyncio.TimeoutError:
+        pass
+    return batch
+
+def read_text_file(file_path):
+    if file_path.endswith(".docx"):
+        from docx import Document
+        doc = Document(file_path)
+        return "\n".join([p.text for p in doc.paragraphs])
+    with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
+        return f.read()
+
+async def extract_batch(batch):
+    results = {}
+    groups = {}
+    for file_data in batch:
+        groups.setdefault(file_data['file_type'], []).append(file_data)
+
+    for file_type, items in groups.items():
+        paths = [item['file_path'] for item in items]
+        if file_type in ['pdf', 'image']:
+            texts = await ocr_processor.extract_text_batch(paths)
+        elif file_type == 'audio':
+            texts = await audio_processor.transcribe_batch(paths)
+        elif file_type == 'text':
+            texts = []
+            for path in paths:
+                try:
+                    texts.append(read_text_file(path))
+                except Exception as e:
+                    texts.append(e)
+        else:
+            texts = [Exception("Unsupported file type during processing")] * len(items)
+        for item, text in zip(items, texts):
+            results[item['case_id']] = text
+    return results
+
+def record_status(case_id, status, error=None):
+    try:
+        db.update_status(case_id, status, error=error)
+    except Exception as e:
+        print(f"Error recording status '{status}' for {case_id}: {e}")
+
 async def agentic_processor():
     print("Agentic processor active")
     while True:
+        batch = await next_batch()
+        print(f"Processing batch of {len(batch)}")
+        for file_data in batch:
+            record_status(file_data['case_id'], 'processing')
         try:
-            file_data = await processing_queue.get()
+            extracted = await extract_batch(batch)
+        except Exception as e:
+            print(f"Error extracting batch: {e}")
+            extracted = {file_data['case_id']: e for file_data in batch}
+
+        for file_data in batch:
             case_id = file_data['case_id']
-            file_path = file_data['file_path']
-            file_type = file_data['file_type']
-
-            print(f"Processing {case_id} ({file_type})")
-
-            if file_type in ['pdf', 'image']:
-                extracted_text = await ocr_processor.extract_text(file_path)
-            elif file_type == 'audio':
-                extracted_text = await audio_processor.transcribe(file_path)
-            elif file_type == 'text':
-                if file_path.endswith(".docx"):
-                    from docx import Document
-                    doc = Document(file_path)
-                    extracted_text = "\n".join([p.text for p in doc.paragraphs])
-                else:
-                    with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                        extracted_text = f.read()
+            try:
+                extracted_text = extracted[case_id]
+                if isinstance(extracted_text, Exception):
+                    raise extracted_text
+
+                cleaned_text = preprocessing_module.clean_text(extracted_text)
+                summary = summarize_text(cleaned_text)
+
+                result_path = os.path.join(DATA_DIR, f"{case_id}_summary.txt")
+                with open(result_path, "w", encoding="utf-8") as f:
+                    f.write(summary)
+                db.save_summary(case_id, {'overview': summary})
+                db.update_status(case_id, 'completed')
+
+                print(f"Completed {case_id}")
+            except Exception as e:
+                print(f"Error processing {case_id}: {e}")
+                record_status(case_id, 'failed', error=str(e))
+        await asyncio.sleep(0.1)
+
+def backfill_legacy_summaries():
+    # Summaries produced before cases were tracked in SQLite only exist as
+    # files in DATA_DIR; register them once so the dashboard still lists them.
+    for path in glob.glob(os.path.join(DATA_DIR, "*_summary.txt")):
+        case_id = os.path.basename(path).split("_summary.txt")[0]
+        try:
+            if db.get_summary(case_id) is not None:
+                continue
+            uploads = glob.glob(os.path.join(UPLOAD_DIR, glob.escape(case_id) + "_*"))
+            if uploads:
+                file_path = uploads[0]
+                file_name = os.path.basename(file_path)[len(case_id) + 1:]
+                file_type = FILE_TYPES.get(file_name.split('.')[-1].lower(), 'unknown')
             else:
-                raise Exception("Unsupported file type during processing")
-
-            cleaned_text = preprocessing_module.clean_text(extracted_text)
-            summary = summarize_text(cleaned_text)
-
-            result_path = os.path.join(DATA_DIR, f"{case_id}_summary.txt")
-            with open(result_path, "w", encoding="utf-8") as f:
-                f.write(summary)
-
-            print(f"Completed {case_id}")
+                file_path, file_name, file_type = path, case_id.split("-", 1)[-1], 'unknown'
+            with open(path, "r", encoding="utf-8") as f:
+                summary = f.read()
+            db.create_case(case_id, file_name, file_type, file_path, upload_date=int(os.path.getmtime(path)))
+            db.save_summary(case_id, {'overview': summary})
+            db.update_status(case_id, 'completed')
+            print(f"Backfilled {case_id}")
         except Exception as e:
-            print(f"Error processing {case_id if 'case_id' in locals() else ''}: {e}")
-        finally:
-            await asyncio.sleep(0.1)
+            print(f"Error backfilling {case_id}: {e}")
 
 @app.on_event("startup")
 async def startup_event():
+    global preprocessing_module, ocr_processor, audio_processor, db
     print("Starting Offline Legal Summarizer API")
+    preprocessing_module = PreprocessingModule()
+    ocr_processor = OCRProcessor()
+    audio_processor = AudioProcessor()
+    db = DatabaseManager()
+    backfill_legacy_summaries()
+    start_monitoring(db)
     asyncio.create_task(agentic_processor())
     print("System ready (no internet required)")
 
@@ -81,16 +174,9 @@ async def root():
     return {"service": "Legal Summarizer API (Offline)", "status": "running"}
 
 @app.get("/api/cases")
-async def list_cases():
-    summaries = []
-    for path in glob.glob(os.path.join(DATA_DIR, "*_summary.txt")):
-        case_id = os.path.basename(path).split("_summary.txt")[0]
-        summaries.append({
-            "case_id": case_id,
-            "file_name": case_id.split("-", 1)[-1],
-            "summary_path": path
-        })
-    return {"cases": summaries}
+async def list_cases(status: Optional[str] = None, limit: int = 50):
+    cases = db.list_cases(status, limit)
+    return {"cases": [{**case, "file_name": case["filename"]} for case in cases]}
 
 @app.post("/api/upload")
 async def upload_file(file: UploadFile = File(...)):
@@ -98,19 +184,23 @@ async def upload_file(file: UploadFile = File(...)):
         case_id = f"CASE-{datetime.now().year}-{str(uuid.uuid4())[:8]}"
         ext = file.filename.split('.')[-1].lower()
 
-        if ext in ['txt', 'doc', 'docx']:
-            file_type = 'text'
-        elif ext in ['pdf', 'jpg', 'jpeg', 'png']:
-            file_type = 'image'
-        elif ext in ['mp3', 'wav', 'm4a']:
-            file_type = 'audio'
-        else:
+        file_type = FILE_TYPES.get(ext)
+        if file_type is None:
             raise HTTPException(400, "Unsupported file type")
 
         save_path = os.path.join(UPLOAD_DIR, f"{case_id}_{file.filename}")
-        with open(save_path, "wb") as f:
-            f.write(await file.read())
-
+        written = 0
+        async with aiofiles.open(save_path, "wb") as out:
+            while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                written += len(chunk)
+                if written > MAX_UPLOAD_SIZE:
+                    break
+                await out.write(chunk)
+        if written > MAX_UPLOAD_SIZE:
+            os.remove(save_path)
+            raise HTTPException(413, "File too large")
+
+        db.create_case(case_id, file.filename, file_type, save_path)
         await processing_queue.put({
             "case_id": case_id,
             "file_path": save_path,
@@ -119,6 +209,8 @@ async def upload_file(file: UploadFile = File(...)):
 
         return {"success": True, "case_id": case_id, "status": "queued"}
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(500, f"Upload failed: {str(e)}")
 
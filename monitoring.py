@@ -1,10 +1,22 @@
 import psutil
 import time
+import threading
+from collections import deque
+from typing import Optional
 from database import DatabaseManager
 
-def monitor_system():
+SAMPLE_INTERVAL = 60
+FLUSH_INTERVAL = 300
+MAX_PENDING_SAMPLES = 3 * 24 * 60
+
+def monitor_system(db: Optional[DatabaseManager] = None):
+    db = db or DatabaseManager()
+    pending = deque(maxlen=MAX_PENDING_SAMPLES)
+    last_flush = time.monotonic()
+    psutil.cpu_percent(interval=None)
     while True:
-        cpu_percent = psutil.cpu_percent(interval=1)
+        time.sleep(SAMPLE_INTERVAL)
+        cpu_percent = psutil.cpu_percent(interval=None)
         memory = psutil.virtual_memory()
         disk = psutil.disk_usage('/')
         
@@ -18,7 +30,24 @@ def monitor_system():
         if memory.percent > 85:
             print("High memory usage!")
         
-        time.sleep(60)
+        recorded_date = int(time.time())
+        pending.extend([
+            ('cpu_percent', cpu_percent, recorded_date),
+            ('memory_percent', memory.percent, recorded_date),
+            ('disk_percent', disk.percent, recorded_date)
+        ])
+        if time.monotonic() - last_flush >= FLUSH_INTERVAL:
+            try:
+                db.log_metrics_bulk(pending)
+                pending.clear()
+            except Exception as e:
+                print(f"Failed to store {len(pending)} metric samples, retrying next flush: {e}")
+            last_flush = time.monotonic()
+
+def start_monitoring(db: Optional[DatabaseManager] = None) -> threading.Thread:
+    thread = threading.Thread(target=monitor_system, args=(db,), daemon=True)
+    thread.start()
+    return thread
 
 if __name__ == '__main__':
     monitor_system()
@@ -1,16 +1,122 @@
 import spacy
+import ahocorasick
 import re
-from typing import Dict, List
+import hashlib
+import functools
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List
 import string
 
+QUOTE_TABLE = str.maketrans({
+    '\u201c': '"',
+    '\u201d': '"',
+    '\u2018': "'",
+    '\u2019': "'",
+})
+
+PIPE_BATCH_SIZE = 64
+TOKENIZER_ONLY = ('tok2vec', 'tagger', 'parser', 'attribute_ruler', 'lemmatizer', 'ner')
+TASK_DISABLE = {
+    'tokenize': TOKENIZER_ONLY,
+    'remove_stopwords': TOKENIZER_ONLY,
+    'lemmatize': ('parser', 'ner'),
+    'sentences': ('tagger', 'attribute_ruler', 'lemmatizer', 'ner'),
+    'key_terms': ('parser', 'lemmatizer', 'ner'),
+    'entities': ('tagger', 'parser', 'attribute_ruler', 'lemmatizer'),
+    'analyze': ('ner',),
+}
+LEGAL_KEEP_WORDS = {
+    'against', 'under', 'before', 'after', 'between',
+    'section', 'act', 'case', 'court'
+}
+TEXT_CACHE_SIZE = 2048
+DOC_CACHE_SIZE = 32
+SECTION_PRIORITY = ['facts', 'arguments', 'evidence', 'conclusion']
+_SECT_RE = re.compile(
+    r'(?P<facts>facts of the case|brief facts)'
+    r'|(?P<arguments>argument|submission)'
+    r'|(?P<evidence>evidence|exhibit)'
+    r'|(?P<conclusion>conclusion|prayer)',
+    re.IGNORECASE
+)
+IMPORTANCE_KEYWORDS = [
+    'accused', 'witness', 'evidence', 'section', 'fir',
+    'complaint', 'theft', 'assault', 'murder', 'case'
+]
+
+_KEYWORD_AUTOMATON = ahocorasick.Automaton()
+for _idx, _keyword in enumerate(IMPORTANCE_KEYWORDS):
+    _KEYWORD_AUTOMATON.add_word(_keyword, (_idx, _keyword))
+_KEYWORD_AUTOMATON.make_automaton()
+
+@functools.lru_cache(maxsize=1)
+def _get_nlp():
+    try:
+        return spacy.load('en_core_web_sm')
+    except:
+        print("SpaCy model not found. Install with: python -m spacy download en_core_web_sm")
+        return None
+
+def _text_key(text: str) -> bytes:
+    return hashlib.blake2b(text.encode('utf-8', 'surrogatepass'), digest_size=16).digest()
+
+def _freeze_entities(entities: Dict[str, List[str]]) -> Dict[str, tuple]:
+    return {key: tuple(values) for key, values in entities.items()}
+
+def _thaw_entities(entities: Dict[str, tuple]) -> Dict[str, List[str]]:
+    return {key: list(values) for key, values in entities.items()}
+
+def _memoize_text(freeze: Callable = None, thaw: Callable = None, maxsize: int = TEXT_CACHE_SIZE):
+    # Results are stored frozen and thawed on every hit so callers can't
+    # mutate each other's cached value.
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, text: str, *args, **kwargs):
+            if not isinstance(text, str):
+                return method(self, text, *args, **kwargs)
+            key = (_text_key(text), args, tuple(sorted(kwargs.items())))
+            cache = self._text_caches[method.__name__]
+            with self._text_cache_lock:
+                if key in cache:
+                    cache.move_to_end(key)
+                    value = cache[key]
+                    return thaw(value) if thaw else value
+            value = method(self, text, *args, **kwargs)
+            frozen = freeze(value) if freeze else value
+            with self._text_cache_lock:
+                cache[key] = frozen
+                if len(cache) > maxsize:
+                    cache.popitem(last=False)
+            return thaw(frozen) if thaw else value
+        return wrapper
+    return decorator
+
 class PreprocessingModule:
     
-    def __init__(self):
-        try:
-            self.nlp = spacy.load('en_core_web_sm')
-        except:
-            print("SpaCy model not found. Install with: python -m spacy download en_core_web_sm")
-            self.nlp = None
+    def __init__(self, lazy_spacy: bool = True):
+        self.lazy_spacy = lazy_spacy
+        self._nlp = None
+        self._nlp_loaded = False
+        self._text_caches = {
+            name: OrderedDict() for name in (
+                'ingest_extract_entities', 'query_extract_entities',
+                'lemmatize', 'extract_sentences', 'extract_key_terms',
+                '_analyze_cached'
+            )
+        }
+        self._text_cache_lock = threading.Lock()
+        if not lazy_spacy:
+            self._load_nlp()
+        
+        self._batch_tasks = {
+            'tokenize': (self.tokenize, self._tokens_from_doc),
+            'lemmatize': (self.lemmatize, self._lemmas_from_doc),
+            'remove_stopwords': (self.remove_stopwords, self._content_words_from_doc),
+            'sentences': (self.extract_sentences, self._sentences_from_doc),
+            'key_terms': (self.extract_key_terms, self._key_terms_from_doc),
+            'entities': (self.query_extract_entities, self._entities_from_doc),
+        }
         
         self.legal_patterns = {
             'IPC_SECTION': r'(?:IPC|Indian Penal Code)\s*(?:Section)?\s*(\d+[A-Z]?)',
@@ -19,115 +125,210 @@ class PreprocessingModule:
             'DATE': r'\d{1,2}[-/]\d{1,2}[-/]\d{2,4}',
             'TIME': r'\d{1,2}:\d{2}\s*(?:AM|PM|hrs)?'
         }
+        legal_entity_keys = {
+            'IPC_SECTION': 'LAW',
+            'CRPC_SECTION': 'LAW',
+            'CASE_NUMBER': 'CASE_NUMBER',
+            'DATE': 'DATE',
+            'TIME': 'TIME'
+        }
+        self._legal_res = [
+            (legal_entity_keys[pattern_type], re.compile(pattern, re.IGNORECASE))
+            for pattern_type, pattern in self.legal_patterns.items()
+        ]
+        
+        ocr_corrections = [
+            (r'\b0\b', 'O'),
+            (r'\bl\b', 'I'),
+            (r'\|\|', 'll'),
+            (r'\|', 'I'),
+        ]
+        self._ocr_re = re.compile('|'.join(
+            f'(?P<g{i}>{pattern})' for i, (pattern, _) in enumerate(ocr_corrections)
+        ))
+        self._ocr_map = {f'g{i}': replacement for i, (_, replacement) in enumerate(ocr_corrections)}
+        self._ellipsis_re = re.compile(r'\.{2,}')
+        self._sentence_split_re = re.compile(r'(?<=[.!?])\s+')
+        self._sentence_gap_re = re.compile(r'([.!?])([A-Z])')
+        
+        self._accused_res = [
+            re.compile(r'(?:accused|defendant|respondent)\s+(?:named\s+)?([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)'),
+            re.compile(r'([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)\s+(?:is|was)\s+accused'),
+        ]
+        self._witness_res = [
+            re.compile(r'witness(?:es)?\s+(?:named\s+)?([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)'),
+            re.compile(r'([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)\s+(?:witnessed|testified)'),
+        ]
+        
+        redundant_phrases = [
+            r'(?P<g0>the|a|an)\s+(?:the|a|an)',
+            r'(?P<g1>that)\s+that',
+            r'(?P<g2>which)\s+which',
+        ]
+        self._redundant_re = re.compile(
+            r'\b(?:' + '|'.join(redundant_phrases) + r')\b', re.IGNORECASE
+        )
+        
+        self._devanagari_re = re.compile(r'[\u0900-\u097F]')
+        self._section_re = re.compile(r'(?:Section|Sec\.?)\s+(\d+)', re.IGNORECASE)
+        abbreviations = [
+            (r'\bFIR\b', 'First Information Report'),
+            (r'\bIPC\b', 'Indian Penal Code'),
+            (r'\bCrPC\b', 'Criminal Procedure Code'),
+            (r'\bHon\'?ble\b', 'Honorable'),
+        ]
+        self._abbrev_re = re.compile('|'.join(
+            f'(?P<g{i}>{abbr})' for i, (abbr, _) in enumerate(abbreviations)
+        ), re.IGNORECASE)
+        self._abbrev_map = {f'g{i}': expansion for i, (_, expansion) in enumerate(abbreviations)}
     
-    def clean_text(self, text: str) -> str:
-        text = re.sub(r'\s+', ' ', text)
-        ocr_corrections = {
-            r'\b0\b': 'O',
-            r'\bl\b': 'I',
-            r'\|\|': 'll',
-            r'\|': 'I',
+    def _load_nlp(self):
+        self._nlp_loaded = True
+        self._nlp = _get_nlp()
+        if self._nlp is None:
+            return
+        self._pipe_disable = {
+            task: [name for name in names if name in self._nlp.pipe_names]
+            for task, names in TASK_DISABLE.items()
         }
-        for pattern, replacement in ocr_corrections.items():
-            text = re.sub(pattern, replacement, text)
-        text = text.replace('"', '"').replace('"', '"')
-        text = text.replace('’', "'").replace('‘', "'")
-        text = re.sub(r'\.{2,}', '.', text)
-        text = re.sub(r'([.!?])([A-Z])', r'\1 \2', text)
+    
+    @property
+    def nlp(self):
+        if not self._nlp_loaded:
+            self._load_nlp()
+        return self._nlp
+    
+    def clean_text(self, text: str) -> str:
         text = ' '.join(text.split())
+        text = self._ocr_re.sub(lambda m: self._ocr_map[m.lastgroup], text)
+        text = text.translate(QUOTE_TABLE)
+        text = self._ellipsis_re.sub('.', text)
+        text = self._sentence_gap_re.sub(r'\1 \2', text)
         return text.strip()
     
+    def _annotate(self, text: str, task: str):
+        return self.nlp(text, disable=self._pipe_disable[task])
+    
+    def analyze(self, text: str):
+        if not self.nlp:
+            return None
+        return self._analyze_cached(text)
+    
+    @_memoize_text(maxsize=DOC_CACHE_SIZE)
+    def _analyze_cached(self, text: str):
+        return self._annotate(text, 'analyze')
+    
+    def process_batch(self, texts: Iterable[str], task: str) -> List:
+        fallback, from_doc = self._batch_tasks[task]
+        if not self.nlp:
+            return [fallback(text) for text in texts]
+        texts = list(texts)
+        if task == 'key_terms':
+            texts = [text.lower() for text in texts]
+        docs = self.nlp.pipe(
+            texts,
+            batch_size=PIPE_BATCH_SIZE,
+            disable=self._pipe_disable[task]
+        )
+        return [from_doc(text, doc) for text, doc in zip(texts, docs)]
+    
+    @_memoize_text(_freeze_entities, _thaw_entities)
+    def ingest_extract_entities(self, text: str) -> Dict[str, List[str]]:
+        return self._entities_from_doc(text, None)
+    
+    @_memoize_text(_freeze_entities, _thaw_entities)
+    def query_extract_entities(self, text: str) -> Dict[str, List[str]]:
+        doc = self._annotate(text, 'entities') if self.nlp else None
+        return self._entities_from_doc(text, doc)
+    
     def extract_entities(self, text: str) -> Dict[str, List[str]]:
-        entities = {
-            'PERSON': [],
-            'GPE': [],
-            'ORG': [],
-            'DATE': [],
-            'TIME': [],
-            'LAW': [],
-            'CASE_NUMBER': [],
-            'ACCUSED': [],
-            'WITNESS': []
+        if self.lazy_spacy:
+            return self.ingest_extract_entities(text)
+        return self.query_extract_entities(text)
+    
+    def _entities_from_doc(self, text: str, doc) -> Dict[str, List[str]]:
+        # Dicts double as insertion-ordered sets while scanning.
+        found = {
+            'PERSON': {},
+            'GPE': {},
+            'ORG': {},
+            'DATE': {},
+            'TIME': {},
+            'LAW': {},
+            'CASE_NUMBER': {}
         }
-        if self.nlp:
-            doc = self.nlp(text)
+        if doc is not None:
             for ent in doc.ents:
-                if ent.label_ in entities:
-                    entities[ent.label_].append(ent.text)
-        for pattern_type, pattern in self.legal_patterns.items():
-            matches = re.findall(pattern, text, re.IGNORECASE)
-            if pattern_type in ['IPC_SECTION', 'CRPC_SECTION']:
-                entities['LAW'].extend(matches)
-            elif pattern_type == 'CASE_NUMBER':
-                entities['CASE_NUMBER'].extend(matches)
-            elif pattern_type == 'DATE':
-                entities['DATE'].extend(matches)
-            elif pattern_type == 'TIME':
-                entities['TIME'].extend(matches)
+                if ent.label_ in found:
+                    found[ent.label_][ent.text] = None
+        for entity_key, pattern in self._legal_res:
+            found[entity_key].update(dict.fromkeys(pattern.findall(text)))
+        entities = {key: list(values) for key, values in found.items()}
         entities['ACCUSED'] = self._identify_accused(text)
         entities['WITNESS'] = self._identify_witnesses(text)
-        for key in entities:
-            entities[key] = list(set(entities[key]))
         return entities
     
     def _identify_accused(self, text: str) -> List[str]:
-        accused = []
-        patterns = [
-            r'(?:accused|defendant|respondent)\s+(?:named\s+)?([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)',
-            r'([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)\s+(?:is|was)\s+accused',
-        ]
-        for pattern in patterns:
-            matches = re.findall(pattern, text)
-            accused.extend(matches)
-        return list(set(accused))
+        accused = {}
+        for pattern in self._accused_res:
+            accused.update(dict.fromkeys(pattern.findall(text)))
+        return list(accused)
     
     def _identify_witnesses(self, text: str) -> List[str]:
-        witnesses = []
-        patterns = [
-            r'witness(?:es)?\s+(?:named\s+)?([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)',
-            r'([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)\s+(?:witnessed|testified)',
-        ]
-        for pattern in patterns:
-            matches = re.findall(pattern, text)
-            witnesses.extend(matches)
-        return list(set(witnesses))
+        witnesses = {}
+        for pattern in self._witness_res:
+            witnesses.update(dict.fromkeys(pattern.findall(text)))
+        return list(witnesses)
     
-    def tokenize(self, text: str) -> List[str]:
+    def tokenize(self, text) -> List[str]:
+        if not isinstance(text, str):
+            return self._tokens_from_doc(text.text, text)
         if self.nlp:
-            doc = self.nlp(text)
-            return [token.text for token in doc]
+            return self._tokens_from_doc(text, self._annotate(text, 'tokenize'))
         else:
             return text.split()
     
-    def lemmatize(self, text: str) -> str:
+    def _tokens_from_doc(self, text: str, doc) -> List[str]:
+        return [token.text for token in doc]
+    
+    @_memoize_text()
+    def lemmatize(self, text) -> str:
+        if not isinstance(text, str):
+            return self._lemmas_from_doc(text.text, text)
         if self.nlp:
-            doc = self.nlp(text)
-            lemmatized = ' '.join([token.lemma_ for token in doc])
-            return lemmatized
+            return self._lemmas_from_doc(text, self._annotate(text, 'lemmatize'))
         return text
     
-    def remove_stopwords(self, text: str) -> str:
+    def _lemmas_from_doc(self, text: str, doc) -> str:
+        return ' '.join([token.lemma_ for token in doc])
+    
+    def remove_stopwords(self, text) -> str:
+        if not isinstance(text, str):
+            return self._content_words_from_doc(text.text, text)
         if self.nlp:
-            doc = self.nlp(text)
-            legal_keep_words = {
-                'against', 'under', 'before', 'after', 'between',
-                'section', 'act', 'case', 'court'
-            }
-            filtered = [
-                token.text for token in doc 
-                if not token.is_stop or token.text.lower() in legal_keep_words
-            ]
-            return ' '.join(filtered)
+            return self._content_words_from_doc(text, self._annotate(text, 'remove_stopwords'))
         return text
     
-    def extract_sentences(self, text: str) -> List[str]:
+    def _content_words_from_doc(self, text: str, doc) -> str:
+        filtered = [
+            token.text for token in doc 
+            if not token.is_stop or token.text.lower() in LEGAL_KEEP_WORDS
+        ]
+        return ' '.join(filtered)
+    
+    @_memoize_text(tuple, list)
+    def extract_sentences(self, text) -> List[str]:
+        if not isinstance(text, str):
+            return self._sentences_from_doc(text.text, text)
         if self.nlp:
-            doc = self.nlp(text)
-            return [sent.text.strip() for sent in doc.sents]
+            return self._sentences_from_doc(text, self._annotate(text, 'sentences'))
         else:
             sentences = re.split(r'[.!?]+', text)
             return [s.strip() for s in sentences if s.strip()]
     
+    def _sentences_from_doc(self, text: str, doc) -> List[str]:
+        return [sent.text.strip() for sent in doc.sents]
+    
     def post_process(self, summary: Dict) -> Dict:
         if 'overview' in summary:
             summary['overview'] = self._clean_summary_text(summary['overview'])
@@ -136,36 +337,22 @@ class PreprocessingModule:
         if 'timeline' in summary:
             summary['timeline'] = self._validate_timeline(summary['timeline'])
         if 'legal_references' in summary:
-            summary['legal_references'] = list(set(summary['legal_references']))
+            summary['legal_references'] = list(dict.fromkeys(summary['legal_references']))
         return summary
     
     def _clean_summary_text(self, text: str) -> str:
         if text:
             text = text[0].upper() + text[1:]
-        redundant_phrases = [
-            r'\b(the|a|an)\s+(the|a|an)\b',
-            r'\bthat\s+that\b',
-            r'\bwhich\s+which\b',
-        ]
-        for phrase in redundant_phrases:
-            text = re.sub(phrase, r'\1', text, flags=re.IGNORECASE)
+        text = self._redundant_re.sub(lambda m: m.group(m.lastgroup), text)
         if text and text[-1] not in '.!?':
             text += '.'
         return text
     
     def _rank_key_points(self, key_points: List[str]) -> List[str]:
-        importance_keywords = [
-            'accused', 'witness', 'evidence', 'section', 'fir',
-            'complaint', 'theft', 'assault', 'murder', 'case'
-        ]
         scored_points = []
         for point in key_points:
-            score = 0
-            point_lower = point.lower()
-            for keyword in importance_keywords:
-                if keyword in point_lower:
-                    score += 1
-            scored_points.append((point, score))
+            hits = {idx for _, (idx, keyword) in _KEYWORD_AUTOMATON.iter(point.lower())}
+            scored_points.append((point, len(hits)))
         scored_points.sort(key=lambda x: x[1], reverse=True)
         return [point for point, score in scored_points]
     
@@ -177,70 +364,55 @@ class PreprocessingModule:
         valid_timeline.sort(key=lambda x: x.get('time', ''))
         return valid_timeline
     
-    def extract_key_terms(self, text: str, n: int = 10) -> List[str]:
+    @_memoize_text(tuple, list)
+    def extract_key_terms(self, text, n: int = 10) -> List[str]:
+        if not isinstance(text, str):
+            return self._key_terms_from_doc(text.text, text, n)
         if not self.nlp:
             return []
-        doc = self.nlp(text.lower())
+        lowered = text.lower()
+        return self._key_terms_from_doc(lowered, self._annotate(lowered, 'key_terms'), n)
+    
+    def _key_terms_from_doc(self, text: str, doc, n: int = 10) -> List[str]:
         key_terms = []
         for token in doc:
             if (token.pos_ in ['NOUN', 'PROPN'] and 
                 not token.is_stop and 
                 len(token.text) > 3):
-                key_terms.append(token.text)
+                key_terms.append(token.lower_)
         from collections import Counter
         term_freq = Counter(key_terms)
         return [term for term, count in term_freq.most_common(n)]
     
     def normalize_legal_text(self, text: str) -> str:
-        text = re.sub(
-            r'(?:Section|Sec\.?)\s+(\d+)',
-            r'Section \1',
-            text,
-            flags=re.IGNORECASE
+        text = self._section_re.sub(r'Section \1', text)
+        text = self._abbrev_re.sub(
+            lambda m: f'{m.group(0)} ({self._abbrev_map[m.lastgroup]})',
+            text
         )
-        abbreviations = {
-            r'\bFIR\b': 'First Information Report',
-            r'\bIPC\b': 'Indian Penal Code',
-            r'\bCrPC\b': 'Criminal Procedure Code',
-            r'\bHon\'?ble\b': 'Honorable',
-        }
-        for abbr, expansion in abbreviations.items():
-            text = re.sub(
-                abbr,
-                f'{abbr} ({expansion})',
-                text,
-                flags=re.IGNORECASE
-            )
         return text
     
     def detect_language(self, text: str) -> str:
-        hindi_chars = set('अआइईउऊएऐओऔकखगघङचछजझञटठडढणतथदधनपफबभमयरलवशषसह')
-        text_chars = set(text)
-        if text_chars.intersection(hindi_chars):
+        if self._devanagari_re.search(text):
             return 'hi'
         return 'en'
     
     def segment_document(self, text: str) -> Dict[str, str]:
         segments = {
-            'header': '',
-            'facts': '',
-            'arguments': '',
-            'evidence': '',
-            'conclusion': ''
+            'header': [],
+            'facts': [],
+            'arguments': [],
+            'evidence': [],
+            'conclusion': []
         }
-        sentences = self.extract_sentences(text)
+        if self.lazy_spacy:
+            sentences = [s for s in self._sentence_split_re.split(text.strip()) if s]
+        else:
+            sentences = self.extract_sentences(text)
         current_section = 'header'
         for sent in sentences:
-            sent_lower = sent.lower()
-            if 'facts of the case' in sent_lower or 'brief facts' in sent_lower:
-                current_section = 'facts'
-            elif 'argument' in sent_lower or 'submission' in sent_lower:
-                current_section = 'arguments'
-            elif 'evidence' in sent_lower or 'exhibit' in sent_lower:
-                current_section = 'evidence'
-            elif 'conclusion' in sent_lower or 'prayer' in sent_lower:
-                current_section = 'conclusion'
-            segments[current_section] += sent + ' '
-        for key in segments:
-            segments[key] = segments[key].strip()
-        return segments
+            cues = {m.lastgroup for m in _SECT_RE.finditer(sent)}
+            if cues:
+                current_section = min(cues, key=SECTION_PRIORITY.index)
+            segments[current_section].append(sent)
+        return {key: ' '.join(sents).strip() for key, sents in segments.items()}
@@ -345,7 +345,7 @@ export default function CaseSummaryView() {
 
   // Load all processed cases
   useEffect(() => {
-    fetch("http://127.0.0.1:8000/api/cases")
+    fetch("http://127.0.0.1:8000/api/cases?status=completed")
       .then((res) => res.json())
       .then((data) => setCases(data.cases || []))
       .catch((err) => console.error("Error loading cases:", err));
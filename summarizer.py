@@ -1,25 +1,53 @@
 from sumy.parsers.plaintext import PlaintextParser
 from sumy.nlp.tokenizers import Tokenizer
-from sumy.summarizers.lex_rank import LexRankSummarizer
-from sumy.summarizers.text_rank import TextRankSummarizer
 from sumy.summarizers.lsa import LsaSummarizer
 from sumy.nlp.stemmers import Stemmer
 from sumy.utils import get_stop_words
+from sklearn.feature_extraction.text import TfidfVectorizer
+import numpy as np
+import functools
+
+LEXRANK_THRESHOLD = 0.1
+LEXRANK_EPSILON = 0.1
+LEXRANK_MAX_ITER = 100
+
+def _stationary_distribution(matrix: np.ndarray) -> np.ndarray:
+    n = matrix.shape[0]
+    p = np.full(n, 1.0 / n)
+    transposed = matrix.T
+    for _ in range(LEXRANK_MAX_ITER):
+        nxt = transposed @ p
+        if np.linalg.norm(nxt - p) < LEXRANK_EPSILON:
+            return nxt
+        p = nxt
+    return p
 
 class Summarizer:
-    def __init__(self):
+    def __init__(self, use_lsa: bool = False):
         self.language = "english"
-        stemmer = Stemmer(self.language)
-        self.models = {
-            "lexrank": LexRankSummarizer(stemmer),
-            "textrank": TextRankSummarizer(stemmer),
-            "lsa": LsaSummarizer(stemmer),
-        }
-        for model in self.models.values():
-            model.stop_words = get_stop_words(self.language)
+        self.models = {"lexrank": self._lexrank}
+        if use_lsa:
+            # appends LSA sentences to the LexRank ones, roughly doubling summary length
+            lsa = LsaSummarizer(Stemmer(self.language))
+            lsa.stop_words = get_stop_words(self.language)
+            self.models["lsa"] = lsa
 
     def _clean(self, text: str) -> str:
-        return " ".join((text or "").replace("\r", " ").replace("\t", " ").split())
+        return " ".join((text or "").split())
+
+    def _lexrank(self, document, sentences_count: int):
+        sentences = document.sentences
+        if len(sentences) <= sentences_count:
+            return sentences
+        tfidf = TfidfVectorizer(stop_words="english").fit_transform([str(s) for s in sentences])
+        similarity = (tfidf @ tfidf.T).toarray()
+        adjacency = (similarity > LEXRANK_THRESHOLD).astype(np.float64)
+        degrees = adjacency.sum(axis=1, keepdims=True)
+        degrees[degrees == 0] = 1
+        adjacency /= degrees
+        scores = _stationary_distribution(adjacency)
+        top = np.sort(np.argsort(-scores, kind="stable")[:sentences_count])
+        return [sentences[i] for i in top]
 
     def summarize(self, text: str, sentences_count: int = 6) -> str:
         text = self._clean(text)
@@ -29,17 +57,21 @@ class Summarizer:
         outputs = []
         for model in self.models.values():
             try:
-                sents = [str(s) for s in model(parser.document, sentences_count)]
-                chunk = " ".join(sents).strip()
-                if chunk:
-                    outputs.append(chunk)
+                sents = [str(s).strip() for s in model(parser.document, sentences_count)]
+                sents = [s for s in sents if s]
+                if sents:
+                    outputs.append(sents)
             except Exception:
                 pass
         if not outputs:
             first = " ".join([str(s) for s in parser.document.sentences[:sentences_count]])
             return first[:2000] if first else text[:2000]
-        combined = " ".join(outputs[:2]) if len(outputs) >= 2 else outputs[0]
+        combined = " ".join(sent for sents in outputs[:2] for sent in sents)
         return combined[:2000]
 
+@functools.lru_cache(maxsize=1)
+def _get_summarizer() -> Summarizer:
+    return Summarizer()
+
 def summarize_text(text: str) -> str:
-    return Summarizer().summarize(text)
+    return _get_summarizer().summarize(text)
@@ -1,21 +1,38 @@
 import os
 import hashlib
+import mmap
 import magic
 from datetime import datetime
 from typing import Optional
 import re
 
+LEGAL_TERMS = [
+    r'\bIPC\b', r'\bCrPC\b', r'\bFIR\b',
+    r'Section\s+\d+', r'Article\s+\d+',
+    r'\baccused\b', r'\bwitness\b', r'\bcomplainant\b'
+]
+_HL_RE = re.compile('|'.join(LEGAL_TERMS), re.IGNORECASE)
+_FIR_RE = re.compile(r'(?:FIR|Case)\s*(?:No\.?|Number)?\s*:?\s*([A-Z0-9/-]+)', re.IGNORECASE)
+_DATE_RE = re.compile(r'\d{1,2}[-/]\d{1,2}[-/]\d{2,4}')
+_SECTION_RE = re.compile(r'Section\s+(\d+[A-Z]?)', re.IGNORECASE)
+
 class FileValidator:
     ALLOWED_TEXT = ['.txt', '.doc', '.docx']
     ALLOWED_IMAGE = ['.pdf', '.jpg', '.jpeg', '.png', '.tiff', '.bmp']
     ALLOWED_AUDIO = ['.mp3', '.wav', '.m4a', '.ogg', '.flac']
     MAX_FILE_SIZE = 50 * 1024 * 1024
+    MIME_SNIFF_BYTES = 4096
+    # libmagic identifies these from structures past the header (OLE2
+    # directory sectors, zip members), so they need the whole file.
+    WHOLE_FILE_MIME_EXTS = ['.doc', '.docx']
+    GENERIC_MIMES = ['application/octet-stream', 'application/zip', 'application/x-ole-storage', 'application/CDFV2']
 
     @classmethod
     def validate_file(cls, file_path: str, file_type: str) -> dict:
-        if not os.path.exists(file_path):
+        try:
+            file_size = os.stat(file_path).st_size
+        except OSError:
             return {'valid': False, 'error': 'File not found'}
-        file_size = os.path.getsize(file_path)
         if file_size > cls.MAX_FILE_SIZE:
             return {'valid': False, 'error': 'File too large'}
         if file_size == 0:
@@ -28,13 +45,24 @@ class FileValidator:
         elif file_type == 'audio' and ext not in cls.ALLOWED_AUDIO:
             return {'valid': False, 'error': 'Invalid audio file format'}
         try:
-            mime = magic.from_file(file_path, mime=True)
+            mime = cls._detect_mime(file_path, ext)
             if not cls._validate_mime(mime, file_type):
                 return {'valid': False, 'error': 'File content does not match extension'}
         except:
             pass
         return {'valid': True, 'error': None}
 
+    @classmethod
+    def _detect_mime(cls, file_path: str, ext: str) -> str:
+        if ext in cls.WHOLE_FILE_MIME_EXTS:
+            return magic.from_file(file_path, mime=True)
+        with open(file_path, 'rb') as f:
+            head = f.read(cls.MIME_SNIFF_BYTES)
+        mime = magic.from_buffer(head, mime=True)
+        if mime in cls.GENERIC_MIMES:
+            return magic.from_file(file_path, mime=True)
+        return mime
+
     @classmethod
     def _validate_mime(cls, mime: str, file_type: str) -> bool:
         valid_mimes = {
@@ -45,11 +73,14 @@ class FileValidator:
         return any(mime.startswith(prefix) for prefix in valid_mimes.get(file_type, []))
 
 def calculate_file_hash(file_path: str) -> str:
-    sha256 = hashlib.sha256()
     with open(file_path, 'rb') as f:
-        for chunk in iter(lambda: f.read(4096), b''):
-            sha256.update(chunk)
-    return sha256.hexdigest()
+        if hasattr(hashlib, 'file_digest'):
+            return hashlib.file_digest(f, 'sha256').hexdigest()
+        sha256 = hashlib.sha256()
+        if os.fstat(f.fileno()).st_size:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                sha256.update(mm)
+        return sha256.hexdigest()
 
 def sanitize_filename(filename: str) -> str:
     filename = os.path.basename(filename)
@@ -74,14 +105,13 @@ def extract_case_info(text: str) -> dict:
         'complainant': None,
         'accused': None
     }
-    fir_match = re.search(r'(?:FIR|Case)\s*(?:No\.?|Number)?\s*:?\s*([A-Z0-9/-]+)', text, re.IGNORECASE)
+    fir_match = _FIR_RE.search(text)
     if fir_match:
         info['fir_number'] = fir_match.group(1)
-    date_match = re.search(r'\d{1,2}[-/]\d{1,2}[-/]\d{2,4}', text)
+    date_match = _DATE_RE.search(text)
     if date_match:
         info['date'] = date_match.group(0)
-    section_matches = re.findall(r'(?:IPC|CrPC)?\s*Section\s+(\d+[A-Z]?)', text, re.IGNORECASE)
-    info['sections'] = list(set(section_matches))
+    info['sections'] = list(dict.fromkeys(_SECTION_RE.findall(text)))
     return info
 
 def calculate_reading_time(text: str, words_per_minute: int = 200) -> int:
@@ -89,20 +119,7 @@ def calculate_reading_time(text: str, words_per_minute: int = 200) -> int:
     return max(1, word_count // words_per_minute)
 
 def highlight_legal_terms(text: str) -> str:
-    legal_terms = [
-        r'\bIPC\b', r'\bCrPC\b', r'\bFIR\b',
-        r'Section\s+\d+', r'Article\s+\d+',
-        r'\baccused\b', r'\bwitness\b', r'\bcomplainant\b'
-    ]
-    highlighted = text
-    for term in legal_terms:
-        highlighted = re.sub(
-            f'({term})',
-            r'<mark>\1</mark>',
-            highlighted,
-            flags=re.IGNORECASE
-        )
-    return highlighted
+    return _HL_RE.sub(r'<mark>\g<0></mark>', text)
 
 class Logger:
     @staticmethod